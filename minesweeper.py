@@ -1,6 +1,28 @@
-import itertools
 import random
-from copy import deepcopy
+import sys
+from collections import Counter, deque
+
+import numpy as np
+
+
+def _nearby_all(board):
+    """
+    Returns a grid holding, for every cell of a boolean board,
+    the number of mines within one row and column of it,
+    not including the cell itself.
+    """
+    height, width = board.shape
+    padded = np.zeros((height + 2, width + 2), dtype=np.int8)
+    padded[1:-1, 1:-1] = board
+
+    # Sum the eight shifted copies of the board around each cell
+    counts = np.zeros((height, width), dtype=np.int8)
+    for di in range(3):
+        for dj in range(3):
+            if (di, dj) != (1, 1):
+                counts += padded[di:di + height, dj:dj + width]
+    return counts
+
 
 class Minesweeper():
     """
@@ -12,23 +34,17 @@ class Minesweeper():
         # Set initial width, height, and number of mines
         self.height = height
         self.width = width
-        self.mines = set()
 
         # Initialize an empty field with no mines
-        self.board = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                row.append(False)
-            self.board.append(row)
-
-        # Add mines randomly
-        while len(self.mines) != mines:
-            i = random.randrange(height)
-            j = random.randrange(width)
-            if not self.board[i][j]:
-                self.mines.add((i, j))
-                self.board[i][j] = True
+        self.board = np.zeros((height, width), dtype=np.bool_)
+
+        # Add mines randomly, drawing distinct flat indices in one pass
+        flat = random.sample(range(height * width), mines)
+        self.mines = {divmod(k, width) for k in flat}
+        self.board.flat[flat] = True
+
+        # Count nearby mines for every cell once, since the board never changes
+        self.counts = _nearby_all(self.board)
 
         # At first, player has found no mines
         self.mines_found = set()
@@ -38,19 +54,12 @@ class Minesweeper():
         Prints a text-based representation
         of where mines are located.
         """
-        for i in range(self.height):
-            print("--" * self.width + "-")
-            for j in range(self.width):
-                if self.board[i][j]:
-                    print("|X", end="")
-                else:
-                    print("| ", end="")
-            print("|")
-        print("--" * self.width + "-")
+        sep = "--" * self.width + "-\n"
+        rows = [sep + "".join(np.where(row, "|X", "| ")) + "|\n" for row in self.board]
+        sys.stdout.write("".join(rows) + sep)     # Writes the whole board at once
 
     def is_mine(self, cell):
-        i, j = cell
-        return self.board[i][j]
+        return bool(self.board[cell])
 
     def nearby_mines(self, cell):
         """
@@ -58,24 +67,7 @@ class Minesweeper():
         within one row and column of a given cell,
         not including the cell itself.
         """
-
-        # Keep count of nearby mines
-        count = 0
-
-        # Loop over all cells within one row and column
-        for i in range(cell[0] - 1, cell[0] + 2):
-            for j in range(cell[1] - 1, cell[1] + 2):
-
-                # Ignore the cell itself
-                if (i, j) == cell:
-                    continue
-
-                # Update count if cell in bounds and is mine
-                if 0 <= i < self.height and 0 <= j < self.width:
-                    if self.board[i][j]:
-                        count += 1
-
-        return count
+        return int(self.counts[cell])
 
     def won(self):
         """
@@ -87,55 +79,50 @@ class Minesweeper():
 class Sentence():
     """
     Logical statement about a Minesweeper game
-    A sentence consists of a set of board cells,
-    and a count of the number of those cells which are mines.
+    A sentence consists of a set of board cells, given as an int bitboard
+    where bit `i * width + j` stands for cell (i, j) rather than as a set
+    of cells, and a count of the number of those cells which are mines.
+    MinesweeperAI.bits maps each cell to its bit, and MinesweeperAI.cells_of
+    turns a bitboard back into cells.
     """
 
+    __slots__ = ("cells", "count", "size", "dirty")
+
     def __init__(self, cells, count):
-        self.cells = set(cells)
+        self.cells = cells
         self.count = count
+        self.size = cells.bit_count()     # Number of cells in the sentence
+        self.dirty = True       # Whether the sentence changed since it was last checked
 
     def __eq__(self, other):
         return self.cells == other.cells and self.count == other.count
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
-
-    def known_mines(self):
-        """
-        Returns the set of all cells in self.cells known to be mines.
-        """
-
-        if len(self.cells) == self.count:  # Checks if the length of the set of cells is equal to the count
-            return self.cells        # If so, returns the entire set because every cell in the set must be a mine
-
+        # Lists the bit indices of the cells, since a sentence does not know the board width
+        indices = [index for index in range(self.cells.bit_length()) if self.cells >> index & 1]
+        return f"{{{', '.join(map(str, indices))}}} = {self.count}"
 
-    def known_safes(self):
-        """
-        Returns the set of all cells in self.cells known to be safe.
-        """
-        if self.count == 0:      # Checks if the count of the sentence is 0
-            return self.cells    # If so, returns the entire set because every cell in the set must be safe
-
-
-
-    def mark_mine(self, cell):
+    def mark_mine(self, bit):
         """
         Updates internal knowledge representation given the fact that
-        a cell is known to be a mine.
+        the cell with the given bit is known to be a mine.
         """
-        if cell in self.cells:       # If the cell is in the sentence's set of cells,
-            self.cells.remove(cell)    # Then removes the cell from the sentence
+        if self.cells & bit:       # If the cell is in the sentence's set of cells,
+            self.cells &= ~bit    # Then removes the cell from the sentence
+            self.size -= 1
             self.count -= 1        # And decreases the count by one as there is one less mine in the set now
+            self.dirty = True
 
 
-    def mark_safe(self, cell):
+    def mark_safe(self, bit):
         """
         Updates internal knowledge representation given the fact that
-        a cell is known to be safe.
+        the cell with the given bit is known to be safe.
         """
-        if cell in self.cells:      # If the cell is in the sentence's set of cells,
-            self.cells.remove(cell)  # then removes the cell from the sentence
+        if self.cells & bit:      # If the cell is in the sentence's set of cells,
+            self.cells &= ~bit  # then removes the cell from the sentence
+            self.size -= 1
+            self.dirty = True
 
 class MinesweeperAI():
     """
@@ -155,8 +142,44 @@ class MinesweeperAI():
         self.mines = set()
         self.safes = set()
 
-        # List of sentences about the game known to be true
-        self.knowledge = []
+        # Keep track of safe cells that have not been clicked on yet
+        self.unused_safes = set()
+
+        # Keep track of cells that are neither clicked on nor known mines
+        self.available = {(i, j) for i in range(height) for j in range(width)}
+
+        # Map every cell to its bit in a bitboard, and every bit index back to its cell
+        self.cells = [(i, j) for i in range(height) for j in range(width)]
+        self.bits = {cell: 1 << index for index, cell in enumerate(self.cells)}
+
+        # Bitboards mirroring moves_made, mines and safes
+        self.moves_bits = 0
+        self.mines_bits = 0
+        self.safes_bits = 0
+
+        # Precompute a bitboard of the in-bounds neighbors of every cell, not including the cell itself
+        self._neighbor_masks = {}
+        bits = self.bits
+        for i in range(height):
+            for j in range(width):
+                self._neighbor_masks[(i, j)] = sum(
+                    bits[(r, c)]
+                    for r in range(max(0, i - 1), min(height, i + 2))
+                    for c in range(max(0, j - 1), min(width, j + 2))
+                    if (r, c) != (i, j)
+                )
+
+        # Sentences about the game known to be true, keyed by id so they can be removed in O(1)
+        self.knowledge = {}
+
+        # Index from each cell's bit to the sentences in knowledge that contain it
+        self._by_cell = {}
+
+        # Number of sentences in knowledge with each (cells, count) fingerprint
+        self._seen = Counter()
+
+        # Sentences that were added or changed and still need to be checked
+        self._dirty = deque()
 
     def mark_mine(self, cell):
         """
@@ -164,8 +187,16 @@ class MinesweeperAI():
         to mark that cell as a mine as well.
         """
         self.mines.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_mine(cell)
+        self.available.discard(cell)
+        bit = self.bits[cell]
+        self.mines_bits |= bit
+        for sentence in self._by_cell.pop(bit, {}).values():   # Only sentences containing the cell are affected
+            self._seen[(sentence.cells, sentence.count)] -= 1
+            queued = sentence.dirty     # Dirty sentences are already waiting to be checked
+            sentence.mark_mine(bit)
+            self._seen[(sentence.cells, sentence.count)] += 1
+            if not queued:
+                self._dirty.append(sentence)
 
     def mark_safe(self, cell):
         """
@@ -173,8 +204,57 @@ class MinesweeperAI():
         to mark that cell as safe as well.
         """
         self.safes.add(cell)
-        for sentence in self.knowledge:
-            sentence.mark_safe(cell)
+        if cell not in self.moves_made:
+            self.unused_safes.add(cell)
+        bit = self.bits[cell]
+        self.safes_bits |= bit
+        for sentence in self._by_cell.pop(bit, {}).values():   # Only sentences containing the cell are affected
+            self._seen[(sentence.cells, sentence.count)] -= 1
+            queued = sentence.dirty     # Dirty sentences are already waiting to be checked
+            sentence.mark_safe(bit)
+            self._seen[(sentence.cells, sentence.count)] += 1
+            if not queued:
+                self._dirty.append(sentence)
+
+    def cells_of(self, bits):
+        """
+        Yields the cells whose bits are set in the given bitboard.
+        """
+        cells = self.cells
+        while bits:
+            low = bits & -bits      # Isolates the lowest set bit
+            yield cells[low.bit_length() - 1]
+            bits ^= low
+
+    def _add_sentence(self, sentence):
+        """
+        Adds a sentence to the knowledge base, unless an equal one
+        is already known, and queues it to be checked.
+        """
+        if self._seen[(sentence.cells, sentence.count)]:
+            return
+        self.knowledge[id(sentence)] = sentence
+        self._seen[(sentence.cells, sentence.count)] += 1
+        by_cell, key = self._by_cell, id(sentence)
+        bits = sentence.cells
+        while bits:
+            low = bits & -bits
+            by_cell.setdefault(low, {})[key] = sentence
+            bits ^= low
+        self._dirty.append(sentence)
+
+    def _remove_sentence(self, sentence):
+        """
+        Removes a sentence from the knowledge base.
+        """
+        del self.knowledge[id(sentence)]
+        self._seen[(sentence.cells, sentence.count)] -= 1
+        by_cell, key = self._by_cell, id(sentence)
+        bits = sentence.cells
+        while bits:
+            low = bits & -bits
+            del by_cell[low][key]
+            bits ^= low
 
     def add_knowledge(self, cell, count):
         """
@@ -193,63 +273,77 @@ class MinesweeperAI():
         """
 
         self.moves_made.add(cell)  # marks the cell as a move that has been made
+        self.unused_safes.discard(cell)
+        self.available.discard(cell)
+        self.moves_bits |= self.bits[cell]
         self.mark_safe(cell) # marks the cells as safe
 
         # Creates a new sentence based on the cell's neighbors and given value of count
-        neighbors = set()
-        for i in range(cell[0] - 1, cell[0] + 2):      # Traverses every cell one column, row, or diagonal away
-            for j in range(cell[1] - 1, cell[1] + 2):   # from the given cell to find its neighbors
-
-                if (i, j) == cell:  # Ignore the cell itself
+        nearby = self._neighbor_masks[cell]
+        count -= (nearby & self.mines_bits).bit_count()   # Known mines will not be included in the sentence, so decreases count
+        neighbors = nearby & ~(self.mines_bits | self.safes_bits | self.moves_bits)  # Keeps only cells whose state is uncertain
+
+        self._add_sentence(Sentence(neighbors, count))   # Adds new sentence to knowledge base
+
+        # Keeps checking sentences that were added or changed until none are left. Sentences
+        # that did not change have already been checked against each other.
+        # Every deduction is sound, but the subset rule is not complete and the larger sentence
+        # of a pair is dropped, so which cells get inferred depends on the order sentences are
+        # checked in. This order differs from a full sweep of the knowledge base, so now and then
+        # a cell a sweep would infer is not inferred (and more often the other way around)
+        knowledge, by_cell, seen, dirty = self.knowledge, self._by_cell, self._seen, self._dirty
+        while dirty:
+            sentence = dirty.popleft()
+            if knowledge.get(id(sentence)) is not sentence:    # Skips sentences removed since being queued
+                continue
+            sentence.dirty = False      # Cleared before checking, so any change made while checking queues it again
+
+            # Removes sentences whose sets are empty (because they have been marked as mines/safes)
+            # or that became equal to another sentence
+            if sentence.cells == 0 or seen[(sentence.cells, sentence.count)] > 1:
+                self._remove_sentence(sentence)
+                continue
+
+            # Checks if sentence contains mines/safes. If so, marks cells as mines/safes, respectively.
+            # The sentence is not empty here, so comparing its size and count is enough.
+            # Marking changes the sentence, which queues it again to be removed
+            if sentence.size == sentence.count:
+                for cell in self.cells_of(sentence.cells):   # Ints are immutable, so marking does not change the iterator
+                    self.mark_mine(cell)
+                continue
+            if sentence.count == 0:
+                for cell in self.cells_of(sentence.cells):
+                    self.mark_safe(cell)
+                continue
+
+            # Checks sentences that strictly contain this one. They must all contain
+            # its lowest cell, so only sentences sharing that cell are looked up.
+            # Cheap size and count checks run before the subset test, and pairs whose
+            # difference would have a negative count are inconsistent and skipped
+            representative = sentence.cells & -sentence.cells
+            for other_sentence in list(by_cell[representative].values()):
+                if (sentence.size < other_sentence.size and sentence.count <= other_sentence.count
+                        and sentence.cells & ~other_sentence.cells == 0):
+                    new_sentence = Sentence(other_sentence.cells & ~sentence.cells, other_sentence.count - sentence.count)
+                    self._add_sentence(new_sentence)   # Adds the difference and removes
+                    self._remove_sentence(other_sentence)  # the larger sentence to avoid redundancy
+
+            # Checks sentences strictly contained in this one, among those sharing any of its cells
+            candidates = {}
+            bits = sentence.cells
+            while bits:
+                low = bits & -bits
+                candidates.update(by_cell[low])
+                bits ^= low
+            for other_sentence in candidates.values():
+                if knowledge.get(id(other_sentence)) is not other_sentence:
                     continue
-
-                if 0 <= i < self.height and 0 <= j < self.width:    # Makes sure the row and column are inside the board
-                    new_cell = (i, j)   # Creates new cell
-                    if new_cell not in self.mines and new_cell not in self.safes and new_cell not in self.moves_made:
-                        neighbors.add(new_cell)     # Adds new cell to set only if its state is uncertain
-                    if new_cell in self.mines:  # If the new cell is known as a mine, then decreases count
-                        count -= 1          # because the cell will not be included in the sentence
-
-        neighbors_sentence = Sentence(neighbors, count)
-        self.knowledge.append(neighbors_sentence)   # Adds new sentence to knowledge base
-
-        change = True
-        while change:   # Keeps finding subsets and marking cells as safe/mines until no new sentences can be added
-            change = False
-            for sentence in self.knowledge:
-
-                # Checks if sentence contains mines/safes. If so, marks cells as mines/safes, respectively
-                if sentence.known_mines() == sentence.cells and len(sentence.cells) != 0:
-                    copy_cells = deepcopy(sentence.cells)       # Uses deepcopy to not change the original iterator
-                    for cell in copy_cells:
-                        self.mark_mine(cell)
-                if sentence.known_safes() == sentence.cells and len(sentence.cells) != 0:
-                    copy_cells = deepcopy(sentence.cells)       # Uses deepcopy to not change the original iterator
-                    for cell in copy_cells:
-                        self.mark_safe(cell)
-
-            # Removes any sentences whose sets are empty (because they have been marked as mines/safes)
-            org_knowledge = deepcopy(self.knowledge)    # Uses deepcopy to not change iterator
-            for sentence in org_knowledge:
-                if len(sentence.cells) == 0:
-                    self.knowledge.remove(sentence)
-
-            org_knowledge = deepcopy(self.knowledge)    # Uses deepcopy to not change iterator
-
-            # Takes two sentences at a time from knowledge and checks for subsets
-            for sentence in org_knowledge:
-                for other_sentence in org_knowledge:
-                    if sentence.cells < other_sentence.cells:    # If one sentence is a subset of the other,
-                        new_cells = other_sentence.cells.difference(sentence.cells)  # then creates new set
-                        new_count = other_sentence.count - sentence.count    # and new count value
-
-                        new_sentence = Sentence(new_cells, new_count)   # Creates new sentence for the subset
-                        if new_sentence not in self.knowledge:  # Adds to knowledge if it does not exist already
-                            self.knowledge.append(new_sentence)
-
-                        if other_sentence in self.knowledge:    # Removes larger sentence of the two
-                            self.knowledge.remove(other_sentence)   # to avoid redundancy and duplicate subsets
-                        change = True
+                if (other_sentence.size < sentence.size and other_sentence.count <= sentence.count
+                        and other_sentence.cells & ~sentence.cells == 0):
+                    new_sentence = Sentence(sentence.cells & ~other_sentence.cells, sentence.count - other_sentence.count)
+                    self._add_sentence(new_sentence)
+                    self._remove_sentence(sentence)
+                    break
 
         return None
 
@@ -264,13 +358,7 @@ class MinesweeperAI():
         This function may use the knowledge in self.mines, self.safes
         and self.moves_made, but should not modify any of those values.
         """
-        # Traverses every cell on board
-        for row in range(self.height):
-            for cell in range(self.width):
-                position = (row, cell)
-                if position in self.safes and position not in self.moves_made:  # If cell is safe and not already a move
-                    return position                 # then returns the cell
-        return None
+        return next(iter(self.unused_safes), None)     # Returns any safe cell not already a move, if there is one
 
 
     def make_random_move(self):
@@ -280,15 +368,6 @@ class MinesweeperAI():
             1) have not already been chosen, and
             2) are not known to be mines
         """
-        possible_cells = []     # Creates empty list of possible moves
-
-        # Traverses every cell on board
-        for row in range(self.height):
-            for cell in range(self.width):
-                position = (row, cell)
-                if position not in self.moves_made and position not in self.mines:
-                    possible_cells.append(position)     # Adds position to list if not mine and not already a move
-
-        if len(possible_cells) == 0:    # If there are no possible moves, returns None
+        if len(self.available) == 0:    # If there are no possible moves, returns None
             return None
-        return random.choice(possible_cells)    # Otherwise returns a random move from list
+        return random.choice(tuple(self.available))    # Otherwise returns a random move from the available cells
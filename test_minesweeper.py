@@ -0,0 +1,62 @@
+import random
+import unittest
+
+from minesweeper import Minesweeper, MinesweeperAI, Sentence
+
+
+class TestInference(unittest.TestCase):
+
+    def play(self, seed, height, width, mines):
+        """
+        Plays a seeded game with the AI, checking after every move
+        that nothing it has inferred contradicts the board.
+        """
+        random.seed(seed)
+        game = Minesweeper(height, width, mines)
+        ai = MinesweeperAI(height, width)
+        while True:
+            move = ai.make_safe_move()
+            safe = move is not None
+            if move is None:
+                move = ai.make_random_move()
+                if move is None:
+                    return
+            self.assertNotIn(move, ai.moves_made)
+            self.assertNotIn(move, ai.mines)
+            if game.is_mine(move):
+                self.assertFalse(safe, f"seed {seed}: safe move {move} is a mine")
+                return
+            ai.add_knowledge(move, game.nearby_mines(move))
+            self.assertLessEqual(ai.mines, game.mines, f"seed {seed}: wrong mine after {move}")
+            self.assertFalse(ai.safes & game.mines, f"seed {seed}: wrong safe after {move}")
+
+    def test_seeded_games_are_sound(self):
+        for seed in range(100):
+            self.play(seed, 8, 8, 8)
+        for seed in range(30):
+            self.play(seed, 16, 16, 40)
+
+    def test_subset_marks_difference_safe(self):
+        # (0, 0) = 1 leaves {(1, 0), (1, 1)} = 1 once (0, 1) is a move, which is a subset of
+        # {(0, 2), (1, 0), (1, 1), (1, 2)} = 1 from (0, 1), so (0, 2) and (1, 2) are safe
+        ai = MinesweeperAI(3, 3)
+        ai.add_knowledge((0, 0), 1)
+        ai.add_knowledge((0, 1), 1)
+        self.assertLessEqual({(0, 2), (1, 2)}, ai.safes)
+        self.assertEqual(ai.mines, set())
+        pair = Sentence(ai.bits[(1, 0)] | ai.bits[(1, 1)], 1)
+        self.assertIn(pair, list(ai.knowledge.values()))
+
+    def test_subset_adds_difference_sentence(self):
+        # Same moves, but with two mines near (0, 1), the difference {(0, 2), (1, 2)} holds one mine
+        ai = MinesweeperAI(3, 3)
+        ai.add_knowledge((0, 0), 1)
+        ai.add_knowledge((0, 1), 2)
+        difference = Sentence(ai.bits[(0, 2)] | ai.bits[(1, 2)], 1)
+        self.assertIn(difference, list(ai.knowledge.values()))
+        self.assertEqual(ai.mines, set())
+        self.assertEqual(ai.safes, {(0, 0), (0, 1)})
+
+
+if __name__ == "__main__":
+    unittest.main()